@@ -7,6 +7,7 @@ from app.models.request import Request
 from app.models.metrics import Metrics
 from app.schemas.evaluation import EvaluationRequest, EvaluationResponse
 from app.services.judge import judge_online
+from app.services.rate_limit import rate_limiter
 from app.services.latency import compute_normalized_latency
 from app.services.scoring import compute_health_score
 
@@ -22,6 +23,11 @@ def evaluate(request: EvaluationRequest, db: Session = Depends(get_db)):
     store them in the DB, and return them.
     """
 
+    # Requests without a userId aren't rate limited: they all arrive through
+    # the proxy, so neither a shared bucket nor the client IP tells them apart
+    if request.userId and not rate_limiter.allow(request.userId):
+        raise HTTPException(status_code=429, detail="Rate limit exceeded for this user")
+
     # 1) Store raw request
     req = Request(
         user_id=request.userId,
@@ -33,9 +39,13 @@ def evaluate(request: EvaluationRequest, db: Session = Depends(get_db)):
     db.add(req)
     db.commit()
     db.refresh(req)
+    # Hand the connection back to the pool while we wait on the judge, so
+    # slow judge calls can't exhaust the pool shared with rate limiting and
+    # the judge cache. The session is reused below.
+    db.close()
 
-    # 2) Judge the answer using Gemini
-    scores = judge_online(req.prompt, req.response)
+    # 2) Judge the answer using Gemini (higher priority goes first under load)
+    scores, reused_from = judge_online(req.prompt, req.response, req.id, request.priority)
 
     factuality = scores["factuality"]
     relevance = scores["relevance"]
@@ -76,4 +86,5 @@ def evaluate(request: EvaluationRequest, db: Session = Depends(get_db)):
         normalizedLatency=norm_latency,
         calibration=calibration,
         healthScore=health,
+        reusedFromRequestId=reused_from,
     )
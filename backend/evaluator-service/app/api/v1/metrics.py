@@ -1,5 +1,9 @@
 # app/api/v1/metrics.py
-from fastapi import APIRouter, Depends
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy import func
 from sqlalchemy.orm import Session
 
@@ -7,6 +11,7 @@ from app.core.db import get_db
 from app.models.request import Request
 from app.models.metrics import Metrics
 from app.schemas.metrics import MetricsSummary, MetricsListResponse, MetricsItem
+from app.services.export import EXPORT_FORMATS, DEFAULT_CHUNK_SIZE, stream_export
 
 router = APIRouter()
 
@@ -86,3 +91,30 @@ def get_recent_metrics(limit: int = 20, db: Session = Depends(get_db)):
         )
 
     return MetricsListResponse(items=items)
+
+
+@router.get("/metrics/export")
+def export_metrics(
+    fmt: str = Query("parquet", alias="format"),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    model: Optional[str] = None,
+    include_text: bool = True,
+    chunk_size: int = Query(DEFAULT_CHUNK_SIZE, ge=1, le=100_000),
+):
+    """
+    Stream requests + metrics as a Parquet or Arrow IPC file for offline
+    analysis (e.g. pandas.read_parquet / pandas.read_feather).
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"format must be one of: {', '.join(sorted(EXPORT_FORMATS))}",
+        )
+
+    filename = f"metrics_export.{fmt}"
+    return StreamingResponse(
+        stream_export(fmt, start, end, model, include_text, chunk_size),
+        media_type=EXPORT_FORMATS[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
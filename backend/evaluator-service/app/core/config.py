@@ -12,6 +12,28 @@ class Settings:
     GEMINI_API_KEY: str = os.getenv("GEMINI_API_KEY", "")
     GEMINI_JUDGE_MODEL: str = os.getenv("GEMINI_JUDGE_MODEL", "gemini-2.0-flash")
     LATENCY_MAX_MS: int = int(os.getenv("LATENCY_MAX_MS", "3000"))
+    # Max concurrent judge calls; requests beyond this queue by priority
+    JUDGE_CONCURRENCY: int = int(os.getenv("JUDGE_CONCURRENCY", "4"))
+    # Reuse judgments of near-duplicate (question, answer) pairs; the
+    # question and the answer must each reach the similarity threshold.
+    # Opt-in: word-overlap similarity can't tell an answer from its negation.
+    DEDUP_ENABLED: bool = os.getenv("DEDUP_ENABLED", "false").lower() == "true"
+    DEDUP_INDEX_PATH: str = os.getenv("DEDUP_INDEX_PATH", "judge_index.bin")
+    DEDUP_SIMILARITY_THRESHOLD: float = float(os.getenv("DEDUP_SIMILARITY_THRESHOLD", "0.8"))
+    GEMINI_API_BASE: str = os.getenv(
+        "GEMINI_API_BASE", "https://generativelanguage.googleapis.com/v1beta/models"
+    )
+
+    # Multi-worker shared state: "" uses the DB (shared_state table),
+    # or a redis:// URL for Redis or a compatible server
+    SHARED_STATE_URL: str = os.getenv("SHARED_STATE_URL", "")
+    # Max /evaluate calls per userId per minute across all workers (0 = off);
+    # requests without a userId are not limited
+    RATE_LIMIT_PER_MINUTE: int = int(os.getenv("RATE_LIMIT_PER_MINUTE", "0"))
+    # Exact-match judge result cache (0 = off) and how long a worker waits
+    # for another worker already judging the same pair
+    JUDGE_CACHE_TTL_S: int = int(os.getenv("JUDGE_CACHE_TTL_S", "86400"))
+    JUDGE_INFLIGHT_WAIT_S: float = float(os.getenv("JUDGE_INFLIGHT_WAIT_S", "30"))
 
     def validate(self):
         if not self.DB_URL:
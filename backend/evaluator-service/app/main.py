@@ -1,4 +1,6 @@
 # app/main.py
+import os
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -18,7 +20,7 @@ app.add_middleware(
 
 @app.get("/health")
 def health_check():
-    return {"status": "ok", "service": "evaluator-service"}
+    return {"status": "ok", "service": "evaluator-service", "pid": os.getpid()}
 
 app.include_router(eval_router, prefix="/api/v1")
 app.include_router(metrics_router, prefix="/api/v1")
@@ -1,5 +1,6 @@
 # app/models/__init__.py
 from app.models.request import Request
 from app.models.metrics import Metrics
+from app.models.shared_state import SharedStateEntry
 
-__all__ = ["Request", "Metrics"]
+__all__ = ["Request", "Metrics", "SharedStateEntry"]
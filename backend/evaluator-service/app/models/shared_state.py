@@ -0,0 +1,13 @@
+# app/models/shared_state.py
+from sqlalchemy import Column, String, Text, BigInteger, DateTime
+from app.core.db import Base
+
+class SharedStateEntry(Base):
+    """Key/value + counter rows shared by all worker processes."""
+
+    __tablename__ = "shared_state"
+
+    key = Column(String(255), primary_key=True)
+    value = Column(Text, nullable=True)
+    counter = Column(BigInteger, nullable=False, default=0)
+    expires_at = Column(DateTime, nullable=False, index=True)
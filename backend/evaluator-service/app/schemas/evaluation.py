@@ -8,6 +8,7 @@ class EvaluationRequest(BaseModel):
     latencyMs: int = Field(..., ge=0, description="Latency in milliseconds")
     modelName: str = Field(..., description="Name of the model used")
     userId: Optional[str] = Field(None, description="Optional user identifier")
+    priority: int = Field(0, description="Higher values are judged first under load")
 
 class EvaluationResponse(BaseModel):
     requestId: int
@@ -18,3 +19,6 @@ class EvaluationResponse(BaseModel):
     normalizedLatency: float
     calibration: float
     healthScore: float
+    reusedFromRequestId: Optional[int] = Field(
+        None, description="Set when scores were reused from a near-duplicate request"
+    )
@@ -0,0 +1,264 @@
+# app/services/dedup.py
+import hashlib
+import os
+import random
+import re
+import struct
+import threading
+from array import array
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.core.config import settings
+
+SCORE_KEYS = ["factuality", "relevance", "coherence", "safety", "calibration"]
+
+# MinHash / LSH parameters. The question and the answer are signed
+# separately (NUM_PERM values each); every LSH band hashes ROWS values from
+# each half, so only pairs similar in both become candidates. NUM_PERM is
+# baked into the index file, so changing it means starting a new file.
+NUM_PERM = 32
+SIGNATURE_SIZE = 2 * NUM_PERM
+BANDS = 8
+ROWS = 2
+
+_MERSENNE_61 = (1 << 61) - 1
+_MAX_32 = (1 << 32) - 1
+_rng = random.Random(20240601)
+_PERMUTATIONS = [
+    (_rng.randrange(1, _MERSENNE_61), _rng.randrange(0, _MERSENNE_61))
+    for _ in range(NUM_PERM)
+]
+
+# File layout: header (magic, version, NUM_PERM, judge model digest), then
+# fixed-size records of
+# (request_id, SIGNATURE_SIZE x uint32 signature, 5 x float64 scores).
+_MAGIC = b"NDIX"
+_VERSION = 3
+_HEADER = struct.Struct("<4sHH16s")
+_RECORD = struct.Struct(f"<q{SIGNATURE_SIZE}I{len(SCORE_KEYS)}d")
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+@dataclass
+class DuplicateMatch:
+    request_id: int
+    similarity: float
+    scores: Dict[str, float]
+
+
+def _shingles(text: str) -> List[str]:
+    """Word bigrams of the normalized text (lowercase, punctuation dropped)."""
+    words = _WORD_RE.findall(text.lower())
+    if len(words) < 2:
+        return words
+    return [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+def _minhash(text: str) -> List[int]:
+    shingles = set(_shingles(text)) or {""}
+    hashes = [
+        int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "little")
+        for s in shingles
+    ]
+    return [
+        min((a * h + b) % _MERSENNE_61 for h in hashes) & _MAX_32
+        for a, b in _PERMUTATIONS
+    ]
+
+
+def compute_signature(question: str, answer: str) -> array:
+    """Question MinHash followed by answer MinHash (SIGNATURE_SIZE values)."""
+    return array("I", _minhash(question) + _minhash(answer))
+
+
+def _similarity(x, y) -> float:
+    return sum(1 for a, b in zip(x, y) if a == b) / NUM_PERM
+
+
+class NearDuplicateIndex:
+    """
+    MinHash + LSH index of previously judged (question, answer) pairs.
+    A pair matches only if both its question and its answer are estimated
+    to be at least `threshold` similar (Jaccard) to the indexed ones.
+
+    Entries are persisted to an append-only file of fixed-size records.
+    `refresh()` loads whatever has been appended since the last call, so the
+    in-memory index is rebuilt incrementally, and several processes sharing
+    the file pick up each other's judgments.
+    """
+
+    def __init__(self, path: str, threshold: float, judge_model: str):
+        self.path = path
+        self.threshold = threshold
+        # Scores are only reusable for the judge model that produced them
+        self.judge_model = judge_model
+        self._model_digest = hashlib.blake2b(
+            judge_model.encode("utf-8"), digest_size=16
+        ).digest()
+        self._lock = threading.Lock()
+        self._offset = 0
+        self._request_ids = array("q")
+        self._signatures = array("I")
+        self._scores = array("d")
+        # One dict per band: band hash -> entry index (or list of indices)
+        self._buckets: List[Dict[int, object]] = [{} for _ in range(BANDS)]
+
+    def __len__(self) -> int:
+        return len(self._request_ids)
+
+    def lookup(self, signature: array) -> Optional[DuplicateMatch]:
+        """Best entry whose question and answer both reach the threshold, if any."""
+        self.refresh()
+
+        candidates = set()
+        with self._lock:
+            for band, key in enumerate(_band_keys(signature)):
+                found = self._buckets[band].get(key)
+                if found is None:
+                    continue
+                if isinstance(found, list):
+                    candidates.update(found)
+                else:
+                    candidates.add(found)
+
+            best_idx, best_similarity = -1, 0.0
+            for idx in candidates:
+                start = idx * SIGNATURE_SIZE
+                similarity = min(
+                    _similarity(signature[:NUM_PERM], self._signatures[start : start + NUM_PERM]),
+                    _similarity(
+                        signature[NUM_PERM:],
+                        self._signatures[start + NUM_PERM : start + SIGNATURE_SIZE],
+                    ),
+                )
+                if similarity > best_similarity:
+                    best_idx, best_similarity = idx, similarity
+
+            if best_idx < 0 or best_similarity < self.threshold:
+                return None
+
+            start = best_idx * len(SCORE_KEYS)
+            scores = dict(zip(SCORE_KEYS, self._scores[start : start + len(SCORE_KEYS)]))
+            return DuplicateMatch(
+                request_id=self._request_ids[best_idx],
+                similarity=best_similarity,
+                scores=scores,
+            )
+
+    def add(self, request_id: int, signature: array, scores: Dict[str, float]) -> None:
+        self.add_many([(request_id, signature, scores)])
+
+    def add_many(self, entries: Iterable[Tuple[int, array, Dict[str, float]]]) -> None:
+        """Append entries to the index file, then load them."""
+        payload = b"".join(
+            _RECORD.pack(request_id, *signature, *(scores[k] for k in SCORE_KEYS))
+            for request_id, signature, scores in entries
+        )
+        self._ensure_file()
+        # O_APPEND keeps concurrent writers from interleaving records
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND)
+        try:
+            view = memoryview(payload)
+            while view:
+                written = os.write(fd, view)
+                view = view[written:]
+        finally:
+            os.close(fd)
+        self.refresh()
+
+    def refresh(self) -> None:
+        """Load records appended to the file since the last refresh."""
+        try:
+            size = os.path.getsize(self.path)
+        except FileNotFoundError:
+            return
+
+        with self._lock:
+            if self._offset == 0:
+                if size < _HEADER.size:
+                    return
+                self._offset = self._read_header()
+
+            complete = (size - self._offset) // _RECORD.size * _RECORD.size
+            if complete <= 0:
+                return
+            with open(self.path, "rb") as f:
+                f.seek(self._offset)
+                data = f.read(complete)
+            self._offset += complete
+
+            for record in _RECORD.iter_unpack(data):
+                idx = len(self._request_ids)
+                signature = record[1 : 1 + SIGNATURE_SIZE]
+                self._request_ids.append(record[0])
+                self._signatures.extend(signature)
+                self._scores.extend(record[1 + SIGNATURE_SIZE :])
+                for band, key in enumerate(_band_keys(signature)):
+                    bucket = self._buckets[band]
+                    found = bucket.get(key)
+                    if found is None:
+                        bucket[key] = idx
+                    elif isinstance(found, list):
+                        found.append(idx)
+                    else:
+                        bucket[key] = [found, idx]
+
+    def _read_header(self) -> int:
+        with open(self.path, "rb") as f:
+            header = f.read(_HEADER.size)
+        if len(header) < _HEADER.size:
+            magic = version = num_perm = model_digest = None
+        else:
+            magic, version, num_perm, model_digest = _HEADER.unpack(header)
+        if magic != _MAGIC or version != _VERSION or num_perm != NUM_PERM:
+            raise ValueError(
+                f"{self.path} is not a compatible near-duplicate index "
+                f"(expected version {_VERSION} with {NUM_PERM} permutations); "
+                f"remove it to start a new one"
+            )
+        if model_digest != self._model_digest:
+            raise ValueError(
+                f"{self.path} holds judgments from a different judge model than "
+                f"{self.judge_model!r}; remove it or point DEDUP_INDEX_PATH at a new file"
+            )
+        return _HEADER.size
+
+    def validate(self) -> None:
+        """Raise if an existing index file can't be used with this index."""
+        if os.path.exists(self.path):
+            self._read_header()
+
+    def _ensure_file(self) -> None:
+        if os.path.exists(self.path):
+            return
+        # Write the header to a temp file and link it into place, so other
+        # processes never see (or append to) a file without its header.
+        tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(_HEADER.pack(_MAGIC, _VERSION, NUM_PERM, self._model_digest))
+        try:
+            os.link(tmp_path, self.path)
+        except FileExistsError:
+            pass
+        finally:
+            os.remove(tmp_path)
+
+
+def _band_keys(signature) -> List[int]:
+    return [
+        hash((
+            tuple(signature[band * ROWS : (band + 1) * ROWS]),
+            tuple(signature[NUM_PERM + band * ROWS : NUM_PERM + (band + 1) * ROWS]),
+        ))
+        for band in range(BANDS)
+    ]
+
+
+judgment_index = NearDuplicateIndex(
+    settings.DEDUP_INDEX_PATH, settings.DEDUP_SIMILARITY_THRESHOLD, settings.GEMINI_JUDGE_MODEL
+)
+if settings.DEDUP_ENABLED:
+    # Fail at startup rather than on the first request
+    judgment_index.validate()
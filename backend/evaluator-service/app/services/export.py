@@ -0,0 +1,204 @@
+# app/services/export.py
+import argparse
+from datetime import datetime
+from typing import Iterator, Optional
+
+import pyarrow as pa
+import pyarrow.ipc as pa_ipc
+import pyarrow.parquet as pq
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.db import SessionLocal
+from app.models.request import Request
+from app.models.metrics import Metrics
+
+EXPORT_FORMATS = {
+    "parquet": "application/vnd.apache.parquet",
+    "arrow": "application/vnd.apache.arrow.file",
+}
+
+DEFAULT_CHUNK_SIZE = 10_000
+
+# (column name, SQLAlchemy column, Arrow type); prompt/response are the
+# bulky text columns that callers can leave out.
+_COLUMNS = [
+    ("request_id", Request.id, pa.int64()),
+    ("user_id", Request.user_id, pa.string()),
+    ("model_name", Request.model_name, pa.string()),
+    ("prompt", Request.prompt, pa.large_string()),
+    ("response", Request.response, pa.large_string()),
+    ("latency_ms", Request.latency_ms, pa.int64()),
+    ("created_at", Request.created_at, pa.timestamp("us")),
+    ("factuality", Metrics.factuality, pa.float64()),
+    ("relevance", Metrics.relevance, pa.float64()),
+    ("coherence", Metrics.coherence, pa.float64()),
+    ("safety", Metrics.safety, pa.float64()),
+    ("normalized_latency", Metrics.normalized_latency, pa.float64()),
+    ("calibration", Metrics.calibration, pa.float64()),
+    ("health_score", Metrics.health_score, pa.float64()),
+    ("evaluated_at", Metrics.created_at, pa.timestamp("us")),
+]
+TEXT_COLUMNS = {"prompt", "response"}
+
+
+class _ChunkSink:
+    """
+    Write-only file object that buffers what the Arrow/Parquet writer emits
+    until we drain it, so output can be streamed chunk by chunk.
+    """
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def writable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return False
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _export_schema(include_text: bool) -> pa.Schema:
+    return pa.schema([
+        (name, arrow_type)
+        for name, _, arrow_type in _COLUMNS
+        if include_text or name not in TEXT_COLUMNS
+    ])
+
+
+def iter_record_batches(
+    db: Session,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    model_name: Optional[str] = None,
+    include_text: bool = True,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Iterator[pa.RecordBatch]:
+    """
+    Yield `requests` joined with `metrics` as Arrow record batches of up to
+    `chunk_size` rows. Rows are fetched through a server-side cursor, so
+    memory use is bounded by the chunk size, not the result size.
+    """
+    columns = [c for c in _COLUMNS if include_text or c[0] not in TEXT_COLUMNS]
+    schema = _export_schema(include_text)
+
+    query = (
+        select(*[column for _, column, _ in columns])
+        .join(Metrics, Metrics.request_id == Request.id)
+        .order_by(Request.id)
+    )
+    if start is not None:
+        query = query.where(Request.created_at >= start)
+    if end is not None:
+        query = query.where(Request.created_at < end)
+    if model_name is not None:
+        query = query.where(Request.model_name == model_name)
+
+    result = db.execute(
+        query.execution_options(stream_results=True, yield_per=chunk_size)
+    )
+    for rows in result.partitions(chunk_size):
+        yield pa.RecordBatch.from_arrays(
+            [
+                pa.array([row[i] for row in rows], type=field.type)
+                for i, field in enumerate(schema)
+            ],
+            schema=schema,
+        )
+
+
+def stream_export(
+    fmt: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    model_name: Optional[str] = None,
+    include_text: bool = True,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Iterator[bytes]:
+    """
+    Encode the export as Parquet (one row group per chunk) or an Arrow IPC
+    file and yield the bytes as they are produced.
+
+    Opens its own DB session: this generator is consumed by a streaming
+    response after the request's dependencies have been torn down.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {fmt}")
+
+    db = SessionLocal()
+    sink = _ChunkSink()
+    writer = None
+    try:
+        for batch in iter_record_batches(
+            db, start, end, model_name, include_text, chunk_size
+        ):
+            if writer is None:
+                writer = _open_writer(fmt, sink, batch.schema)
+            writer.write_batch(batch)
+            yield sink.drain()
+
+        if writer is None:
+            # No matching rows: still emit a valid, empty file
+            writer = _open_writer(fmt, sink, _export_schema(include_text))
+        writer.close()
+        yield sink.drain()
+    finally:
+        db.close()
+
+
+def _open_writer(fmt: str, sink: _ChunkSink, schema: pa.Schema):
+    if fmt == "parquet":
+        return pq.ParquetWriter(sink, schema)
+    return pa_ipc.new_file(sink, schema)
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Export evaluation history (requests + metrics) to Parquet or Arrow IPC."
+    )
+    parser.add_argument("--out", required=True, help="output file path")
+    parser.add_argument("--format", choices=sorted(EXPORT_FORMATS), default="parquet")
+    parser.add_argument("--start", type=datetime.fromisoformat, help="created_at >= START")
+    parser.add_argument("--end", type=datetime.fromisoformat, help="created_at < END")
+    parser.add_argument("--model", help="only export this model_name")
+    parser.add_argument("--no-text", action="store_true", help="leave out prompt/response")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    # python -m app.services.export --out history.parquet --start 2025-01-01
+    args = _parse_args()
+    with open(args.out, "wb") as f:
+        for chunk in stream_export(
+            args.format,
+            start=args.start,
+            end=args.end,
+            model_name=args.model,
+            include_text=not args.no_text,
+            chunk_size=args.chunk_size,
+        ):
+            f.write(chunk)
+    print(f"Export written to: {args.out}")
@@ -2,13 +2,11 @@
 import requests
 from app.core.config import settings
 
-GEMINI_API_BASE = "https://generativelanguage.googleapis.com/v1beta/models"
-
 def call_gemini_chat(model: str, prompt_text: str) -> str:
     """
     Call Gemini's generateContent with a simple text prompt.
     """
-    url = f"{GEMINI_API_BASE}/{model}:generateContent"
+    url = f"{settings.GEMINI_API_BASE}/{model}:generateContent"
     headers = {
         "Content-Type": "application/json",
         "x-goog-api-key": settings.GEMINI_API_KEY,
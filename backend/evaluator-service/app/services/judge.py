@@ -1,9 +1,12 @@
 # app/services/judge.py
 import json
-from typing import Dict, Optional
+from typing import Dict, Optional, Tuple
 
 from app.core.config import settings
+from app.services.dedup import compute_signature, judgment_index
 from app.services.gemini_client import call_gemini_chat
+from app.services.judge_cache import judge_cache
+from app.services.judge_queue import judge_gate
 
 JUDGE_PROMPT_TEMPLATE = """
 You are an expert evaluator of AI assistant responses.
@@ -65,11 +68,53 @@ def _extract_json(raw: str) -> Optional[dict]:
         return None
 
 
-def judge_online(question: str, answer: str) -> Dict[str, float]:
+def judge_online(
+    question: str, answer: str, request_id: Optional[int] = None, priority: int = 0
+) -> Tuple[Dict[str, float], Optional[int]]:
     """
     Use Gemini as a judge for a live answer (no reference answer available).
-    Returns scores in [0,1] for factuality, relevance, coherence, safety, calibration.
+    Returns scores in [0,1] for factuality, relevance, coherence, safety, calibration,
+    plus the requestId whose judgment was reused (None if Gemini was called).
+
+    If the same pair (shared judge cache) or a near-duplicate pair was judged
+    before, its scores are reused instead of calling Gemini. Fresh judgments
+    are stored in both under `request_id`.
+
+    Only the Gemini call itself takes a `judge_gate` slot (ordered by
+    `priority`); reuse lookups and waiting on another worker's in-flight
+    judgment don't hold one.
     """
+    cache_key = judge_cache.key_for(question, answer)
+    cached = judge_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    signature = None
+    if settings.DEDUP_ENABLED:
+        signature = compute_signature(question, answer)
+        match = judgment_index.lookup(signature)
+        if match is not None:
+            return match.scores, match.request_id
+
+    # Another worker may be judging this exact pair right now
+    claimed, cached = judge_cache.claim(cache_key)
+    if cached is not None:
+        return cached
+    try:
+        return _judge_with_gemini(question, answer, request_id, priority, cache_key, signature)
+    finally:
+        if claimed:
+            judge_cache.release(cache_key)
+
+
+def _judge_with_gemini(
+    question: str,
+    answer: str,
+    request_id: Optional[int],
+    priority: int,
+    cache_key: str,
+    signature,
+) -> Tuple[Dict[str, float], Optional[int]]:
     prompt = (
         JUDGE_PROMPT_TEMPLATE
         + "\n\nQUESTION:\n"
@@ -79,12 +124,15 @@ def judge_online(question: str, answer: str) -> Dict[str, float]:
         + "\n"
     )
 
-    raw = call_gemini_chat(settings.GEMINI_JUDGE_MODEL, prompt)
+    # Higher priority goes first when all judge slots are busy
+    with judge_gate.slot(priority):
+        raw = call_gemini_chat(settings.GEMINI_JUDGE_MODEL, prompt)
 
     # DEBUG: if you want to see what Gemini is actually returning:
     # print("RAW JUDGE OUTPUT:\n", raw)
 
     scores = _extract_json(raw)
+    parsed = scores is not None
     if scores is None:
         print("Warning: judge returned non-JSON or malformed JSON, using default neutral scores.")
         scores = {
@@ -105,4 +153,10 @@ def judge_online(question: str, answer: str) -> Dict[str, float]:
         value = max(0.0, min(1.0, value))
         result[key] = value
 
-    return result
+    # Only store real judgments, never the neutral fallback
+    if parsed:
+        judge_cache.put(cache_key, result, request_id)
+        if signature is not None and request_id is not None:
+            judgment_index.add(request_id, signature, result)
+
+    return result, None
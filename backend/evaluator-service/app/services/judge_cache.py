@@ -0,0 +1,149 @@
+# app/services/judge_cache.py
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.services.shared_state import shared_state
+
+CachedJudgment = Tuple[Dict[str, float], Optional[int]]
+
+
+class JudgeResultCache:
+    """
+    Exact-match cache of judge scores keyed by (judge model, question, answer),
+    stored in shared state so every worker process can reuse it.
+
+    Per-process fast path: recent results are also kept in a small in-memory
+    LRU, and duplicate requests inside one process wait on a local event
+    rather than polling shared state.
+
+    In-flight tracking: before calling the judge, a worker claims the key in
+    shared state; other workers that get the same pair meanwhile wait for
+    that result (up to `inflight_wait_s`) instead of judging it again.
+    """
+
+    POLL_INTERVAL_S = 0.1
+    LOCAL_SIZE = 10_000
+
+    def __init__(self, state, ttl_s: int, inflight_wait_s: float):
+        self._state = state
+        self._ttl_s = ttl_s
+        self._inflight_wait_s = inflight_wait_s
+        self._lock = threading.Lock()
+        self._local: "OrderedDict[str, Tuple[float, CachedJudgment]]" = OrderedDict()
+        self._local_inflight: Dict[str, threading.Event] = {}
+        self._shared_claims = set()
+
+    @property
+    def enabled(self) -> bool:
+        return self._ttl_s > 0
+
+    @staticmethod
+    def key_for(question: str, answer: str) -> str:
+        digest = hashlib.sha256(
+            "\0".join([settings.GEMINI_JUDGE_MODEL, question, answer]).encode("utf-8")
+        ).hexdigest()
+        return f"judge:{digest}"
+
+    def get(self, key: str) -> Optional[CachedJudgment]:
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            entry = self._local.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._local.move_to_end(key)
+                return entry[1]
+
+        raw = self._state.get(key)
+        if raw is None:
+            return None
+        data = json.loads(raw)
+        judgment = (data["scores"], data["requestId"])
+        self._remember(key, judgment)
+        return judgment
+
+    def put(self, key: str, scores: Dict[str, float], request_id: Optional[int]) -> None:
+        if not self.enabled:
+            return
+        self._state.set(key, json.dumps({"scores": scores, "requestId": request_id}), self._ttl_s)
+        self._remember(key, (scores, request_id))
+
+    def claim(self, key: str) -> Tuple[bool, Optional[CachedJudgment]]:
+        """
+        Claim `key` for judging. Returns (claimed, cached): if another worker
+        finished the same judgment while we waited, `cached` holds its result.
+        If the wait times out we judge anyway. Call `release()` afterwards
+        whenever `claimed` is True.
+        """
+        if not self.enabled:
+            return False, None
+
+        deadline = time.monotonic() + self._inflight_wait_s
+
+        while True:
+            with self._lock:
+                event = self._local_inflight.get(key)
+                if event is None:
+                    self._local_inflight[key] = threading.Event()
+                    break
+            event.wait(max(0.0, deadline - time.monotonic()))
+            cached = self.get(key)
+            if cached is not None:
+                return False, cached
+            if time.monotonic() >= deadline:
+                return False, None
+
+        # We own the key in this process; now claim it across processes.
+        # If shared state fails, drop the local claim so later requests for
+        # this pair don't wait out inflight_wait_s on an orphaned event.
+        inflight_key = f"inflight:{key}"
+        ttl_s = max(1, int(self._inflight_wait_s * 2))
+        try:
+            while not self._state.add(inflight_key, str(os.getpid()), ttl_s):
+                cached = self.get(key)
+                if cached is not None:
+                    self._release_local(key)
+                    return False, cached
+                if time.monotonic() >= deadline:
+                    return True, None
+                time.sleep(self.POLL_INTERVAL_S)
+        except Exception:
+            self._release_local(key)
+            raise
+        with self._lock:
+            self._shared_claims.add(key)
+        return True, None
+
+    def release(self, key: str) -> None:
+        with self._lock:
+            held = key in self._shared_claims
+            self._shared_claims.discard(key)
+        try:
+            if held:
+                self._state.delete(f"inflight:{key}")
+        finally:
+            self._release_local(key)
+
+    def _release_local(self, key: str) -> None:
+        with self._lock:
+            event = self._local_inflight.pop(key, None)
+        if event is not None:
+            event.set()
+
+    def _remember(self, key: str, judgment: CachedJudgment) -> None:
+        with self._lock:
+            self._local[key] = (time.monotonic() + self._ttl_s, judgment)
+            self._local.move_to_end(key)
+            while len(self._local) > self.LOCAL_SIZE:
+                self._local.popitem(last=False)
+
+
+judge_cache = JudgeResultCache(
+    shared_state, settings.JUDGE_CACHE_TTL_S, settings.JUDGE_INFLIGHT_WAIT_S
+)
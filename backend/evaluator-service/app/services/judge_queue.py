@@ -0,0 +1,46 @@
+# app/services/judge_queue.py
+import heapq
+import itertools
+import threading
+from contextlib import contextmanager
+
+from app.core.config import settings
+
+
+class PriorityGate:
+    """
+    Limit how many judge calls run at once. When all slots are busy, waiting
+    requests are admitted highest priority first (FIFO within a priority),
+    so critical traffic gets scored first under load.
+
+    /evaluate is a sync endpoint, so each request waits here on its own
+    worker thread.
+    """
+
+    def __init__(self, limit: int):
+        self._limit = limit
+        self._active = 0
+        self._waiting = []
+        self._counter = itertools.count()
+        self._cond = threading.Condition()
+
+    @contextmanager
+    def slot(self, priority: int = 0):
+        ticket = (-priority, next(self._counter))
+        with self._cond:
+            heapq.heappush(self._waiting, ticket)
+            while self._active >= self._limit or self._waiting[0] != ticket:
+                self._cond.wait()
+            heapq.heappop(self._waiting)
+            self._active += 1
+            # Another slot may still be free for the next waiter in line
+            self._cond.notify_all()
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._active -= 1
+                self._cond.notify_all()
+
+
+judge_gate = PriorityGate(settings.JUDGE_CONCURRENCY)
@@ -0,0 +1,47 @@
+# app/services/rate_limit.py
+import threading
+import time
+
+from app.core.config import settings
+from app.services.shared_state import shared_state
+
+
+class RateLimiter:
+    """
+    Fixed one-minute window per subject (userId), counted in shared state so
+    the limit holds across all worker processes.
+
+    Fast path: once a subject goes over the limit, this process remembers it
+    and rejects further requests in that window without touching the backend.
+    """
+
+    WINDOW_S = 60
+
+    def __init__(self, state, limit_per_window: int):
+        self._state = state
+        self._limit = limit_per_window
+        self._lock = threading.Lock()
+        self._blocked = {}  # subject -> window it is blocked for
+        self._window = 0
+
+    def allow(self, subject: str) -> bool:
+        if self._limit <= 0:
+            return True
+
+        window = int(time.time() // self.WINDOW_S)
+        with self._lock:
+            if window != self._window:
+                self._window = window
+                self._blocked.clear()
+            if self._blocked.get(subject) == window:
+                return False
+
+        count = self._state.incr(f"ratelimit:{subject}:{window}", self.WINDOW_S)
+        if count > self._limit:
+            with self._lock:
+                self._blocked[subject] = window
+            return False
+        return True
+
+
+rate_limiter = RateLimiter(shared_state, settings.RATE_LIMIT_PER_MINUTE)
@@ -0,0 +1,146 @@
+# app/services/shared_state.py
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import case, delete, select
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app.core.config import settings
+from app.core.db import engine
+from app.models.shared_state import SharedStateEntry
+
+_table = SharedStateEntry.__table__
+
+
+class DbSharedState:
+    """
+    Shared state in the `shared_state` table, so every uvicorn/gunicorn
+    worker (and every replica pointing at the same DB) sees the same
+    counters and keys. Expired rows are treated as absent and purged lazily.
+    """
+
+    PURGE_INTERVAL_S = 60
+
+    def __init__(self, engine):
+        self._engine = engine
+        self._next_purge = 0.0
+        if engine.dialect.name == "postgresql":
+            self._insert = postgresql.insert
+        elif engine.dialect.name == "sqlite":
+            self._insert = sqlite.insert
+        else:
+            raise ValueError(f"Unsupported database for shared state: {engine.dialect.name}")
+
+    def incr(self, key: str, ttl_s: int) -> int:
+        """Increment a counter that resets once it expires; returns the new value."""
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=ttl_s)
+        expired = _table.c.expires_at <= now
+        stmt = (
+            self._insert(_table)
+            .values(key=key, counter=1, expires_at=expires_at)
+            .on_conflict_do_update(
+                index_elements=[_table.c.key],
+                set_={
+                    "counter": case((expired, 1), else_=_table.c.counter + 1),
+                    "expires_at": case((expired, expires_at), else_=_table.c.expires_at),
+                },
+            )
+            .returning(_table.c.counter)
+        )
+        with self._engine.begin() as conn:
+            count = conn.execute(stmt).scalar_one()
+        self._maybe_purge()
+        return count
+
+    def get(self, key: str) -> Optional[str]:
+        stmt = select(_table.c.value).where(
+            _table.c.key == key, _table.c.expires_at > datetime.utcnow()
+        )
+        with self._engine.connect() as conn:
+            return conn.execute(stmt).scalar_one_or_none()
+
+    def set(self, key: str, value: str, ttl_s: int) -> None:
+        expires_at = datetime.utcnow() + timedelta(seconds=ttl_s)
+        stmt = (
+            self._insert(_table)
+            .values(key=key, value=value, counter=0, expires_at=expires_at)
+            .on_conflict_do_update(
+                index_elements=[_table.c.key],
+                set_={"value": value, "expires_at": expires_at},
+            )
+        )
+        with self._engine.begin() as conn:
+            conn.execute(stmt)
+        self._maybe_purge()
+
+    def add(self, key: str, value: str, ttl_s: int) -> bool:
+        """Set `key` only if it is absent (or expired). Returns True if we set it."""
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=ttl_s)
+        stmt = (
+            self._insert(_table)
+            .values(key=key, value=value, counter=0, expires_at=expires_at)
+            .on_conflict_do_update(
+                index_elements=[_table.c.key],
+                set_={"value": value, "expires_at": expires_at},
+                where=_table.c.expires_at <= now,
+            )
+            .returning(_table.c.key)
+        )
+        with self._engine.begin() as conn:
+            return conn.execute(stmt).first() is not None
+
+    def delete(self, key: str) -> None:
+        with self._engine.begin() as conn:
+            conn.execute(delete(_table).where(_table.c.key == key))
+
+    def _maybe_purge(self) -> None:
+        if time.monotonic() < self._next_purge:
+            return
+        self._next_purge = time.monotonic() + self.PURGE_INTERVAL_S
+        with self._engine.begin() as conn:
+            conn.execute(delete(_table).where(_table.c.expires_at <= datetime.utcnow()))
+
+
+class RedisSharedState:
+    """Same interface as DbSharedState, backed by Redis (or a compatible server)."""
+
+    def __init__(self, url: str):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError(
+                "SHARED_STATE_URL points at Redis but the 'redis' package is not installed"
+            )
+        self._client = redis.Redis.from_url(url, decode_responses=True)
+
+    def incr(self, key: str, ttl_s: int) -> int:
+        pipe = self._client.pipeline()
+        # Start the window (with its TTL) only if the counter doesn't exist yet
+        pipe.set(key, 0, ex=ttl_s, nx=True)
+        pipe.incr(key)
+        _, count = pipe.execute()
+        return count
+
+    def get(self, key: str) -> Optional[str]:
+        return self._client.get(key)
+
+    def set(self, key: str, value: str, ttl_s: int) -> None:
+        self._client.set(key, value, ex=ttl_s)
+
+    def add(self, key: str, value: str, ttl_s: int) -> bool:
+        return bool(self._client.set(key, value, ex=ttl_s, nx=True))
+
+    def delete(self, key: str) -> None:
+        self._client.delete(key)
+
+
+def _create_shared_state():
+    if settings.SHARED_STATE_URL.startswith(("redis://", "rediss://", "unix://")):
+        return RedisSharedState(settings.SHARED_STATE_URL)
+    return DbSharedState(engine)
+
+
+shared_state = _create_shared_state()
@@ -0,0 +1,160 @@
+# benchmarks/bench_dedup.py
+"""
+Lookup latency and hit rate of the near-duplicate judgment index.
+
+    cd backend/evaluator-service
+    python -m benchmarks.bench_dedup --entries 1000000
+
+The index is filled with random filler signatures (stand-ins for unrelated
+past judgments) plus --pairs real (question, answer) pairs and the same
+questions with one-word answers. We then query those pairs with the question
+re-cased/re-punctuated and --replace answer words swapped (should hit),
+unrelated pairs (should miss), and the same questions with different
+answers, long or one-word (should miss).
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from array import array
+
+os.environ.setdefault("GEMINI_API_KEY", "unused-by-benchmark")
+
+from app.services.dedup import (  # noqa: E402
+    SIGNATURE_SIZE,
+    NearDuplicateIndex,
+    compute_signature,
+)
+
+FILLER_SCORES = {
+    "factuality": 0.5,
+    "relevance": 0.5,
+    "coherence": 0.5,
+    "safety": 0.5,
+    "calibration": 0.5,
+}
+
+
+def make_vocabulary(rng: random.Random, size: int = 5000):
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    return ["".join(rng.choice(letters) for _ in range(rng.randint(3, 9))) for _ in range(size)]
+
+
+def make_pair(rng: random.Random, vocab):
+    question = " ".join(rng.choice(vocab) for _ in range(rng.randint(8, 15))) + "?"
+    answer = ". ".join(
+        " ".join(rng.choice(vocab) for _ in range(rng.randint(8, 16)))
+        for _ in range(rng.randint(3, 6))
+    ) + "."
+    return question, answer
+
+
+def paraphrase(rng: random.Random, vocab, text: str, replace: int) -> str:
+    """Change casing/punctuation and swap a few words, like a light rewording."""
+    words = text.replace(".", " .").split()
+    for _ in range(replace):
+        words[rng.randrange(len(words))] = rng.choice(vocab)
+    out = " ".join(words).replace(" .", ",")
+    return out[0].upper() + out[1:] + "!"
+
+
+def percentile(values, pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(pct / 100 * len(ordered)))]
+
+
+def run(entries: int, pairs: int, threshold: float, replace: int, seed: int) -> None:
+    rng = random.Random(seed)
+    vocab = make_vocabulary(rng)
+    path = os.path.join(tempfile.mkdtemp(), "judge_index.bin")
+    index = NearDuplicateIndex(path, threshold, "bench-judge")
+
+    t0 = time.perf_counter()
+    filler = entries - 2 * pairs
+    chunk = 100_000
+    for start in range(0, filler, chunk):
+        n = min(chunk, filler - start)
+        raw = array("I", os.urandom(4 * SIGNATURE_SIZE * n))
+        index.add_many(
+            (start + i, raw[i * SIGNATURE_SIZE : (i + 1) * SIGNATURE_SIZE], FILLER_SCORES)
+            for i in range(n)
+        )
+
+    originals = [make_pair(rng, vocab) for _ in range(pairs)]
+    short_answers = [rng.choice(vocab) + "." for _ in range(pairs)]
+    index.add_many(
+        (filler + i, compute_signature(q, a), FILLER_SCORES)
+        for i, (q, a) in enumerate(originals)
+    )
+    index.add_many(
+        (filler + pairs + i, compute_signature(q, a), FILLER_SCORES)
+        for i, ((q, _), a) in enumerate(zip(originals, short_answers))
+    )
+    build_s = time.perf_counter() - t0
+
+    # Simulate a restart: load the persisted file into a fresh index
+    t0 = time.perf_counter()
+    index = NearDuplicateIndex(path, threshold, "bench-judge")
+    index.refresh()
+    load_s = time.perf_counter() - t0
+
+    def measure(queries):
+        sig_ms, lookup_ms, hits = [], [], []
+        for q, a in queries:
+            t0 = time.perf_counter()
+            signature = compute_signature(q, a)
+            t1 = time.perf_counter()
+            match = index.lookup(signature)
+            t2 = time.perf_counter()
+            sig_ms.append((t1 - t0) * 1000)
+            lookup_ms.append((t2 - t1) * 1000)
+            hits.append(match)
+        return sig_ms, lookup_ms, hits
+
+    paraphrased = [
+        (paraphrase(rng, vocab, q, 0), paraphrase(rng, vocab, a, replace))
+        for q, a in originals
+    ]
+    sig_ms, lookup_ms, hits = measure(paraphrased)
+    correct = sum(
+        1 for i, match in enumerate(hits)
+        if match is not None and match.request_id == filler + i
+    )
+
+    _, miss_lookup_ms, false_hits = measure([make_pair(rng, vocab) for _ in range(pairs)])
+    _, _, new_answer_hits = measure([(q, make_pair(rng, vocab)[1]) for q, _ in originals])
+    _, _, new_word_hits = measure([
+        (q, next(w for w in iter(lambda: rng.choice(vocab) + ".", None) if w != a))
+        for (q, _), a in zip(originals, short_answers)
+    ])
+
+    print(f"entries:                 {len(index):,}")
+    print(f"index file:              {os.path.getsize(path) / 1e6:.1f} MB")
+    print(f"build (append + load):   {build_s:.1f} s")
+    print(f"load from disk:          {load_s:.1f} s")
+    print(f"signature ms p50/p95:    {statistics.median(sig_ms):.3f} / {percentile(sig_ms, 95):.3f}")
+    print(
+        f"lookup ms p50/p95/p99:   {statistics.median(lookup_ms):.3f} / "
+        f"{percentile(lookup_ms, 95):.3f} / {percentile(lookup_ms, 99):.3f}"
+    )
+    print(f"miss lookup ms p50:      {statistics.median(miss_lookup_ms):.3f}")
+    print(f"paraphrase hit rate:     {correct / pairs:.1%} (threshold={threshold}, {replace} words swapped)")
+    print(f"false hit rate:          {sum(1 for m in false_hits if m) / pairs:.1%}")
+    print(
+        f"same question, different answer false hits: "
+        f"{sum(1 for m in new_answer_hits if m) / pairs:.1%} (long) / "
+        f"{sum(1 for m in new_word_hits if m) / pairs:.1%} (one word)"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--entries", type=int, default=1_000_000)
+    parser.add_argument("--pairs", type=int, default=1000)
+    parser.add_argument("--threshold", type=float, default=0.8)
+    parser.add_argument("--replace", type=int, default=2, help="answer words swapped per paraphrase")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    run(args.entries, args.pairs, args.threshold, args.replace, args.seed)
@@ -0,0 +1,176 @@
+# benchmarks/bench_workers.py
+"""
+/evaluate throughput with 1..N uvicorn workers on one machine.
+
+    cd backend/evaluator-service
+    python -m benchmarks.bench_workers --max-workers 4
+
+Gemini is replaced by a local fake generateContent server (GEMINI_API_BASE)
+that answers after --judge-ms, so the numbers measure the service itself,
+not Gemini quota. Every request uses a unique prompt, so neither the judge
+cache nor the near-duplicate index short-circuits the work. DB_URL is taken
+from the environment (use the real Postgres for representative numbers) and
+defaults to a throwaway SQLite file.
+
+JUDGE_CONCURRENCY is per worker, so it is set to --judge-concurrency divided
+by the worker count: every run gets the same total number of concurrent
+judge calls, and the speedup reflects the workers rather than extra Gemini
+concurrency. The "judge cap" column is the throughput that judge
+concurrency alone allows (slots / judge latency); numbers near it are
+judge-bound, not worker-bound.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+JUDGE_REPLY = json.dumps({
+    "candidates": [{
+        "content": {"parts": [{"text": json.dumps({
+            "factuality": 0.9,
+            "relevance": 0.8,
+            "coherence": 0.8,
+            "safety": 1.0,
+            "calibration": 0.7,
+        })}]}
+    }]
+}).encode("utf-8")
+
+ANSWER = " ".join(
+    "Overfitting is when a model learns the training data too well, including the noise."
+    for _ in range(20)
+)
+
+
+def start_fake_gemini(judge_ms: int) -> ThreadingHTTPServer:
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            time.sleep(judge_ms / 1000)
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(JUDGE_REPLY)))
+            self.end_headers()
+            self.wfile.write(JUDGE_REPLY)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def wait_until_healthy(base_url: str, timeout_s: float = 60) -> None:
+    deadline = time.monotonic() + timeout_s
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(f"{base_url}/health", timeout=1).ok:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"evaluator at {base_url} did not become healthy")
+
+
+def run_load(base_url: str, total: int, concurrency: int):
+    local = threading.local()
+
+    def one(_):
+        if not hasattr(local, "session"):
+            local.session = requests.Session()
+        body = {
+            "prompt": f"Explain overfitting ({uuid.uuid4()})",
+            "response": ANSWER,
+            "latencyMs": 800,
+            "modelName": "bench-model",
+            "userId": f"bench-{threading.get_ident()}",
+        }
+        start = time.perf_counter()
+        resp = local.session.post(f"{base_url}/api/v1/evaluate", json=body, timeout=120)
+        resp.raise_for_status()
+        return (time.perf_counter() - start) * 1000
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(concurrency)))  # warm-up
+        start = time.perf_counter()
+        latencies = list(pool.map(one, range(total)))
+        elapsed = time.perf_counter() - start
+    return total / elapsed, latencies
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--judge-ms", type=int, default=20)
+    parser.add_argument(
+        "--judge-concurrency",
+        type=int,
+        default=16,
+        help="total concurrent judge calls across all workers",
+    )
+    parser.add_argument("--port", type=int, default=8011)
+    args = parser.parse_args()
+
+    fake = start_fake_gemini(args.judge_ms)
+    tmp_dir = tempfile.mkdtemp()
+    env = {
+        **os.environ,
+        "DB_URL": os.environ.get("DB_URL", f"sqlite:///{tmp_dir}/bench.db"),
+        "GEMINI_API_KEY": os.environ.get("GEMINI_API_KEY", "unused-by-benchmark"),
+        "GEMINI_API_BASE": f"http://127.0.0.1:{fake.server_address[1]}",
+        "DEDUP_INDEX_PATH": os.path.join(tmp_dir, "judge_index.bin"),
+        "RATE_LIMIT_PER_MINUTE": "0",
+    }
+    base_url = f"http://127.0.0.1:{args.port}"
+
+    print(
+        f"{'workers':>7} {'slots':>6} {'judge cap':>10} {'req/s':>8} "
+        f"{'p50 ms':>8} {'p95 ms':>8} {'speedup':>8}"
+    )
+    baseline = None
+    for workers in range(1, args.max_workers + 1):
+        per_worker = max(1, args.judge_concurrency // workers)
+        slots = per_worker * workers
+        proc = subprocess.Popen(
+            [
+                sys.executable, "-m", "uvicorn", "app.main:app",
+                "--port", str(args.port),
+                "--workers", str(workers),
+                "--log-level", "warning",
+            ],
+            env={**env, "JUDGE_CONCURRENCY": str(per_worker)},
+        )
+        try:
+            wait_until_healthy(base_url)
+            throughput, latencies = run_load(base_url, args.requests, args.concurrency)
+        finally:
+            proc.terminate()
+            proc.wait()
+
+        latencies.sort()
+        baseline = baseline or throughput
+        print(
+            f"{workers:>7} {slots:>6} {slots * 1000 / args.judge_ms:>10.0f} {throughput:>8.1f} "
+            f"{statistics.median(latencies):>8.1f} "
+            f"{latencies[int(0.95 * (len(latencies) - 1))]:>8.1f} {throughput / baseline:>7.2f}x"
+        )
+
+    fake.shutdown()
+
+
+if __name__ == "__main__":
+    main()
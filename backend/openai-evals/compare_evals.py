@@ -0,0 +1,448 @@
+import argparse
+import json
+import math
+import random
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
+from statistics import NormalDist, stdev
+from typing import Dict, Any, List, Optional
+
+import yaml
+
+from run_evals import (
+    MODE_FULL,
+    MODE_REJUDGE_ONLY,
+    MODE_RESCORE_ONLY,
+    SCORE_KEYS,
+    EvalConfig,
+    ResultCache,
+    evaluate_sample,
+    load_config,
+    load_dataset,
+)
+
+DIMENSIONS = SCORE_KEYS + ["latency_ms", "health_score"]
+
+
+# ---------- Data structures ----------
+
+@dataclass
+class CompareConfig:
+    targets: List[str]
+    alpha: float
+    bootstrap_iterations: int
+    permutation_iterations: int
+    seed: int
+    early_stopping_metric: str
+    min_samples: Optional[int]
+    check_every: int
+    max_looks: int
+    output_path: str
+
+
+# ---------- Config loading ----------
+
+def load_compare_config(path: str) -> CompareConfig:
+    with open(path, "r", encoding="utf-8") as f:
+        raw = yaml.safe_load(f)
+
+    compare = raw.get("compare") or {}
+    targets = compare.get("targets") or []
+    if len(targets) < 2:
+        raise RuntimeError("compare.targets must list at least two target models")
+
+    early = compare.get("early_stopping") or {}
+    metric = early.get("metric", "health_score")
+    if metric not in DIMENSIONS:
+        raise RuntimeError(f"Unknown early_stopping.metric {metric!r}")
+
+    return CompareConfig(
+        targets=targets,
+        alpha=compare.get("alpha", 0.05),
+        bootstrap_iterations=compare.get("bootstrap_iterations", 2000),
+        permutation_iterations=compare.get("permutation_iterations", 2000),
+        seed=compare.get("seed", 0),
+        early_stopping_metric=metric,
+        # Without min_samples early stopping is off and the full dataset runs
+        min_samples=early.get("min_samples"),
+        check_every=early.get("check_every", 10),
+        max_looks=early.get("max_looks", 5),
+        output_path=compare.get("output_path", "compare_report.json"),
+    )
+
+
+# ---------- Statistics ----------
+
+# Resampling runs must be able to resolve p-values (and CI tails) well below
+# the alpha they're compared against: aim for at least this many resamples
+# in the rejection tail.
+TAIL_RESAMPLES = 20
+
+# Resampling is pure Python, O(samples x resamples). Past this many draws per
+# test we use the normal approximation instead, which the CLT makes accurate
+# at exactly the sample sizes where resampling gets slow.
+RESAMPLE_BUDGET = 2_000_000
+
+# Grid points used to integrate the sequential boundary
+_BOUNDARY_GRID = 101
+
+_NORMAL = NormalDist()
+
+
+def resamples_for(alpha: float, configured: int) -> int:
+    return max(configured, math.ceil(TAIL_RESAMPLES / alpha))
+
+
+def use_resampling(n: int, iterations: int) -> bool:
+    return n * iterations <= RESAMPLE_BUDGET
+
+
+def mean(values: List[float]) -> float:
+    return sum(values) / len(values) if values else 0.0
+
+
+def bootstrap_ci(
+    deltas: List[float], iterations: int, alpha: float, rng: random.Random
+) -> List[float]:
+    """Percentile bootstrap confidence interval for the mean paired delta."""
+    n = len(deltas)
+    if n == 0:
+        return [0.0, 0.0]
+    means = sorted(
+        sum(deltas[rng.randrange(n)] for _ in range(n)) / n
+        for _ in range(iterations)
+    )
+    low = means[int((alpha / 2) * (iterations - 1))]
+    high = means[int((1 - alpha / 2) * (iterations - 1))]
+    return [low, high]
+
+
+def normal_ci(deltas: List[float], alpha: float) -> List[float]:
+    """Normal-approximation confidence interval for the mean paired delta."""
+    n = len(deltas)
+    if n < 2:
+        return [mean(deltas), mean(deltas)]
+    half = _NORMAL.inv_cdf(1 - alpha / 2) * stdev(deltas) / math.sqrt(n)
+    return [mean(deltas) - half, mean(deltas) + half]
+
+
+def paired_permutation_test(
+    deltas: List[float], iterations: int, rng: random.Random
+) -> float:
+    """
+    Two-sided sign-flip permutation test of H0: mean paired delta == 0.
+    Under H0 each delta is equally likely to have either sign, so we compare
+    the observed |mean| against means with randomly flipped signs.
+
+    Stops as soon as TAIL_RESAMPLES flips are at least as extreme as the
+    observed value (Besag & Clifford sequential Monte Carlo p-value), so
+    clearly non-significant tests stay cheap even with many iterations.
+    """
+    n = len(deltas)
+    if n == 0:
+        return 1.0
+    observed = abs(sum(deltas))
+    # Small tolerance so float noise in identical sums counts as "as extreme"
+    threshold = observed - 1e-12
+    extreme = 0
+    for done in range(1, iterations + 1):
+        total = sum(d if rng.random() < 0.5 else -d for d in deltas)
+        if abs(total) >= threshold:
+            extreme += 1
+            if extreme >= TAIL_RESAMPLES:
+                return extreme / done
+    return (extreme + 1) / (iterations + 1)
+
+
+def normal_sign_flip_test(deltas: List[float]) -> float:
+    """
+    Normal approximation of `paired_permutation_test`: under random sign
+    flips the sum of deltas has mean 0 and variance sum(d^2).
+    """
+    variance = sum(d * d for d in deltas)
+    if variance == 0:
+        return 1.0
+    return 2 * _NORMAL.cdf(-abs(sum(deltas)) / math.sqrt(variance))
+
+
+def test_mean_delta(
+    deltas: List[float], alpha: float, ccfg: CompareConfig, rng: random.Random
+) -> Dict[str, Any]:
+    """p-value and (1 - alpha) CI for the mean delta, resampled when affordable."""
+    n = len(deltas)
+    permutations = resamples_for(alpha, ccfg.permutation_iterations)
+    bootstraps = resamples_for(alpha, ccfg.bootstrap_iterations)
+    if use_resampling(n, permutations):
+        p_value, method = paired_permutation_test(deltas, permutations, rng), "permutation"
+    else:
+        p_value, method = normal_sign_flip_test(deltas), "normal"
+    if use_resampling(n, bootstraps):
+        ci = bootstrap_ci(deltas, bootstraps, alpha, rng)
+    else:
+        ci = normal_ci(deltas, alpha)
+    return {"p_value": p_value, "ci": ci, "method": method}
+
+
+def look_schedule(total: int, ccfg: CompareConfig) -> List[int]:
+    """
+    Sample counts at which the early-stopping metric is tested; the last one
+    is the final analysis. Looks start at min_samples and come every
+    check_every samples, spread out further if that would exceed max_looks.
+    """
+    if ccfg.min_samples is None or total <= ccfg.min_samples or ccfg.max_looks < 2:
+        return [total]
+    interim = list(range(ccfg.min_samples, total, ccfg.check_every))
+    if len(interim) > ccfg.max_looks - 1:
+        span = total - ccfg.min_samples
+        interim = sorted({
+            ccfg.min_samples + j * span // (ccfg.max_looks - 1)
+            for j in range(ccfg.max_looks - 1)
+        })
+    return interim + [total]
+
+
+def obrien_fleming_alphas(looks: List[int], alpha: float) -> List[float]:
+    """
+    Nominal two-sided alpha for each look under the Lan-DeMets
+    O'Brien-Fleming alpha-spending function, so the overall false-positive
+    rate stays at `alpha`. Early looks get very little alpha and the final
+    look keeps most of it.
+
+    Each boundary is found by numerically integrating the distribution of
+    the (Brownian) cumulative test statistic over the region where no
+    earlier look stopped.
+    """
+    z = _NORMAL.inv_cdf(1 - alpha / 2)
+
+    def spent(t: float) -> float:
+        return 2 * _NORMAL.cdf(-z / math.sqrt(t))
+
+    nominal: List[float] = []
+    grid: List[float] = []
+    density: List[float] = []
+    prev_t = prev_spent = 0.0
+    for n in looks:
+        t = n / looks[-1]
+        target = (alpha if t == 1 else spent(t)) - prev_spent
+
+        if not nominal:
+            c = -_NORMAL.inv_cdf(target / 2) if target > 0 else math.inf
+        else:
+            sd = math.sqrt(t - prev_t)
+            step = grid[1] - grid[0]
+            weights = [step * f for f in density]
+            weights[0] /= 2
+            weights[-1] /= 2
+
+            def crossing(bound: float) -> float:
+                return sum(
+                    w * (_NORMAL.cdf((-bound - u) / sd) + _NORMAL.cdf((u - bound) / sd))
+                    for u, w in zip(grid, weights)
+                )
+
+            if target <= 0:
+                c = math.inf
+            else:
+                low, high = 0.0, 40 * math.sqrt(t)
+                for _ in range(60):
+                    mid = (low + high) / 2
+                    if crossing(mid) > target:
+                        low = mid
+                    else:
+                        high = mid
+                c = high / math.sqrt(t)
+        nominal.append(2 * _NORMAL.cdf(-c))
+
+        # Density of the cumulative statistic over the continuation region
+        bound = min(c, 8.0) * math.sqrt(t)
+        new_grid = [
+            -bound + 2 * bound * i / (_BOUNDARY_GRID - 1) for i in range(_BOUNDARY_GRID)
+        ]
+        if not grid:
+            density = [_NORMAL.pdf(s / math.sqrt(t)) / math.sqrt(t) for s in new_grid]
+        else:
+            density = [
+                sum(w * _NORMAL.pdf((s - u) / sd) / sd for u, w in zip(grid, weights))
+                for s in new_grid
+            ]
+        grid = new_grid
+        prev_t, prev_spent = t, prev_spent + target
+
+    return nominal
+
+
+# ---------- Main comparison loop ----------
+
+def paired_deltas(
+    rows: List[Dict[str, Dict[str, Any]]], baseline: str, challenger: str, key: str
+) -> List[float]:
+    return [row[challenger][key] - row[baseline][key] for row in rows]
+
+
+def evaluate_targets(
+    target_cfgs: Dict[str, EvalConfig],
+    cache: ResultCache,
+    sample,
+    mode: str,
+    pool: ThreadPoolExecutor,
+) -> Dict[str, Dict[str, Any]]:
+    """Evaluate one sample against every target concurrently."""
+    futures = {
+        target: pool.submit(evaluate_sample, cfg, cache, sample, mode)
+        for target, cfg in target_cfgs.items()
+    }
+    return {target: future.result() for target, future in futures.items()}
+
+
+def run_comparison(config_path: str = "eval_config.yaml", mode: str = MODE_FULL) -> None:
+    cfg = load_config(config_path)
+    ccfg = load_compare_config(config_path)
+    samples = load_dataset(cfg.dataset_path)
+    cache = ResultCache(cfg.cache_dir)
+    rng = random.Random(ccfg.seed)
+
+    baseline, challengers = ccfg.targets[0], ccfg.targets[1:]
+    target_cfgs = {
+        target: replace(cfg, target_model_name=target) for target in ccfg.targets
+    }
+
+    # Alpha spending over the looks keeps the overall false-positive rate
+    # at `alpha` for the sequentially tested metric. Every other dimension
+    # is only tested once, at the end, at `alpha`.
+    looks = look_schedule(len(samples), ccfg)
+    look_alphas = obrien_fleming_alphas(looks, ccfg.alpha)
+    final_alpha = look_alphas[-1]
+
+    print(f"Loaded {len(samples)} samples from {cfg.dataset_path}")
+    print(f"Baseline: {baseline}; challengers: {', '.join(challengers)}")
+    print(f"Using judge model: {cfg.judge_model_name}")
+    if ccfg.min_samples is not None:
+        print(
+            f"Early stopping on {ccfg.early_stopping_metric}: looks at n={looks}, "
+            f"alpha per look={[round(a, 5) for a in look_alphas]}"
+        )
+
+    rows: List[Dict[str, Dict[str, Any]]] = []
+    stopped_early = False
+
+    with ThreadPoolExecutor(max_workers=len(ccfg.targets)) as pool:
+        for i, sample in enumerate(samples, start=1):
+            print(f"\n=== Sample {i}/{len(samples)} (id={sample.id}) ===")
+            rows.append(evaluate_targets(target_cfgs, cache, sample, mode, pool))
+
+            # Very early looks can have (numerically) no alpha to spend
+            if i in looks[:-1] and look_alphas[looks.index(i)] > 0:
+                look_alpha = look_alphas[looks.index(i)]
+                p_values = {
+                    challenger: test_mean_delta(
+                        paired_deltas(rows, baseline, challenger, ccfg.early_stopping_metric),
+                        look_alpha,
+                        ccfg,
+                        rng,
+                    )["p_value"]
+                    for challenger in challengers
+                }
+                print(f"Interim look at n={i}: p={json.dumps(p_values)}")
+                if all(p < look_alpha for p in p_values.values()):
+                    print("All differences significant; stopping early.")
+                    stopped_early = True
+                    final_alpha = look_alpha
+                    break
+
+    comparisons = []
+    for challenger in challengers:
+        dimensions = {}
+        for key in DIMENSIONS:
+            # The CI is built at the same level the p-value is judged at
+            key_alpha = final_alpha if key == ccfg.early_stopping_metric else ccfg.alpha
+            deltas = paired_deltas(rows, baseline, challenger, key)
+            result = test_mean_delta(deltas, key_alpha, ccfg, rng)
+            dimensions[key] = {
+                "mean_delta": mean(deltas),
+                "ci": result["ci"],
+                "alpha": key_alpha,
+                "p_value": result["p_value"],
+                "method": result["method"],
+                "significant": result["p_value"] < key_alpha,
+            }
+        comparisons.append(
+            {"baseline": baseline, "challenger": challenger, "dimensions": dimensions}
+        )
+
+    report = {
+        "config": {
+            "targets": ccfg.targets,
+            "judge_model_name": cfg.judge_model_name,
+            "dataset_path": cfg.dataset_path,
+            "latency_max_ms": cfg.latency_max_ms,
+            "alpha": ccfg.alpha,
+            "looks": looks,
+            "alpha_per_look": look_alphas,
+            "early_stopping_metric": ccfg.early_stopping_metric,
+        },
+        "samples_evaluated": len(rows),
+        "samples_total": len(samples),
+        "stopped_early": stopped_early,
+        "averages": {
+            target: {key: mean([row[target][key] for row in rows]) for key in DIMENSIONS}
+            for target in ccfg.targets
+        },
+        "comparisons": comparisons,
+        "samples": [
+            {
+                "id": row[baseline]["id"],
+                "deltas": {
+                    challenger: {
+                        key: row[challenger][key] - row[baseline][key] for key in DIMENSIONS
+                    }
+                    for challenger in challengers
+                },
+                "results": row,
+            }
+            for row in rows
+        ],
+    }
+
+    with open(ccfg.output_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+
+    print(f"\n=== Comparison complete ({len(rows)}/{len(samples)} samples) ===")
+    for comparison in comparisons:
+        health = comparison["dimensions"]["health_score"]
+        print(
+            f"{comparison['challenger']} vs {baseline}: "
+            f"health delta={health['mean_delta']:+.3f} "
+            f"CI=[{health['ci'][0]:+.3f}, {health['ci'][1]:+.3f}] "
+            f"p={health['p_value']:.4f}"
+        )
+    print(f"Report written to: {ccfg.output_path}")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Compare two or more target models over the same samples."
+    )
+    parser.add_argument("--config", default="eval_config.yaml")
+    reuse = parser.add_mutually_exclusive_group()
+    reuse.add_argument(
+        "--rejudge-only",
+        action="store_true",
+        help="reuse cached target answers/latencies and only re-run the judge",
+    )
+    reuse.add_argument(
+        "--rescore-only",
+        action="store_true",
+        help="reuse cached answers and judge scores; only recompute health",
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.rescore_only:
+        run_mode = MODE_RESCORE_ONLY
+    elif args.rejudge_only:
+        run_mode = MODE_REJUDGE_ONLY
+    else:
+        run_mode = MODE_FULL
+    run_comparison(args.config, run_mode)
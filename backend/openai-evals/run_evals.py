@@ -1,8 +1,13 @@
+import argparse
+import hashlib
 import json
 import os
+import subprocess
+import sys
+import threading
 import time
-from dataclasses import dataclass
-from typing import Dict, Any, List
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Optional, Tuple
 
 import yaml
 import requests
@@ -33,6 +38,8 @@ class EvalConfig:
     dataset_path: str
     latency_max_ms: int
     output_path: str
+    target_generation_config: Dict[str, Any] = field(default_factory=dict)
+    cache_dir: str = ".eval_cache"
 
 
 # ---------- Config loading ----------
@@ -47,6 +54,8 @@ def load_config(path: str) -> EvalConfig:
         dataset_path=raw["dataset"]["path"],
         latency_max_ms=raw["latency"]["max_ms"],
         output_path=raw["output"]["path"],
+        target_generation_config=raw["target"].get("generation_config") or {},
+        cache_dir=(raw.get("cache") or {}).get("dir", ".eval_cache"),
     )
 
 
@@ -68,7 +77,11 @@ def load_dataset(path: str) -> List[Sample]:
 
 # ---------- Gemini helper ----------
 
-def call_gemini_chat(model: str, prompt_text: str) -> str:
+def call_gemini_chat(
+    model: str,
+    prompt_text: str,
+    generation_config: Optional[Dict[str, Any]] = None,
+) -> str:
     """
     Call Gemini's generateContent endpoint with a simple text prompt.
     """
@@ -85,6 +98,8 @@ def call_gemini_chat(model: str, prompt_text: str) -> str:
             }
         ]
     }
+    if generation_config:
+        body["generationConfig"] = generation_config
 
     resp = requests.post(url, headers=headers, json=body, timeout=60)
     resp.raise_for_status()
@@ -162,25 +177,40 @@ Return ONLY the JSON object, nothing else.
 """
 
 
-def judge_answer(
-    judge_model: str,
+def build_judge_prompt(
     question: str,
     model_answer: str,
     reference_answer: str,
-) -> Dict[str, float]:
-    """Ask the judge model (Gemini) to rate the answer on 5 dimensions."""
-    prompt = (
+) -> str:
+    return (
         f"{JUDGE_SYSTEM_PROMPT}\n\n"
         f"QUESTION:\n{question}\n\n"
         f"MODEL_ANSWER:\n{model_answer}\n\n"
         f"REFERENCE_ANSWER:\n{reference_answer}"
     )
 
+
+def judge_answer(
+    judge_model: str,
+    question: str,
+    model_answer: str,
+    reference_answer: str,
+) -> Tuple[Dict[str, float], bool]:
+    """
+    Ask the judge model (Gemini) to rate the answer on 5 dimensions.
+    Returns (scores, parsed); parsed is False when the judge output wasn't
+    a JSON object and the neutral fallback scores were used instead.
+    """
+    prompt = build_judge_prompt(question, model_answer, reference_answer)
+
     content = call_gemini_chat(judge_model, prompt)
 
     try:
         scores = json.loads(content)
+        parsed = isinstance(scores, dict)
     except json.JSONDecodeError:
+        parsed = False
+    if not parsed:
         print("Warning: judge returned non-JSON, using default neutral scores.")
         scores = {
             "factuality": 0.5,
@@ -200,108 +230,441 @@ def judge_answer(
         value = max(0.0, min(1.0, value))
         result[key] = value
 
-    return result
+    return result, parsed
+
+
+# ---------- Result cache ----------
+
+MODE_FULL = "full"
+MODE_REJUDGE_ONLY = "rejudge-only"
+MODE_RESCORE_ONLY = "rescore-only"
+
+
+def _sha256(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """
+    On-disk cache of target answers and judge scores, one JSON file per entry:
+
+        <root>/target/<key>.json  -> {"model_answer": ..., "latency_ms": ...}
+        <root>/judge/<key>.json   -> {"factuality": ..., "calibration": ...}
+
+    Target entries are keyed by (target model, sample id, prompt hash,
+    generation config); judge entries by (judge model, sample id, judge
+    prompt hash), so editing the judge prompt or getting a new answer
+    invalidates the judge entry automatically.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+
+    @staticmethod
+    def target_key(
+        model: str, sample: Sample, generation_config: Dict[str, Any]
+    ) -> str:
+        return _sha256(json.dumps(
+            {
+                "model": model,
+                "sample_id": sample.id,
+                "prompt_sha256": _sha256(sample.prompt),
+                "generation_config": generation_config,
+            },
+            sort_keys=True,
+        ))
+
+    @staticmethod
+    def judge_key(judge_model: str, sample_id: str, judge_prompt: str) -> str:
+        return _sha256(json.dumps(
+            {
+                "model": judge_model,
+                "sample_id": sample_id,
+                "prompt_sha256": _sha256(judge_prompt),
+            },
+            sort_keys=True,
+        ))
+
+    def _path(self, kind: str, key: str) -> str:
+        return os.path.join(self.root, kind, f"{key}.json")
+
+    def get(self, kind: str, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._path(kind, key), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def put(self, kind: str, key: str, value: Dict[str, Any]) -> None:
+        path = self._path(kind, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write-then-rename so a crashed run never leaves a half-written entry.
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(value, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+
+def get_target_answer(
+    cfg: EvalConfig, cache: ResultCache, sample: Sample, mode: str
+) -> Dict[str, Any]:
+    """Return {"model_answer", "latency_ms"}, from the cache or a fresh call."""
+    key = ResultCache.target_key(
+        cfg.target_model_name, sample, cfg.target_generation_config
+    )
+
+    if mode != MODE_FULL:
+        cached = cache.get("target", key)
+        if cached is None:
+            raise RuntimeError(
+                f"No cached answer for sample {sample.id} "
+                f"(model={cfg.target_model_name}); run without --{mode} first"
+            )
+        return cached
+
+    start = time.time()
+    model_answer = call_gemini_chat(
+        cfg.target_model_name, sample.prompt, cfg.target_generation_config
+    )
+    latency_ms = (time.time() - start) * 1000.0
+
+    entry = {"model_answer": model_answer, "latency_ms": latency_ms}
+    cache.put("target", key, entry)
+    return entry
+
+
+def get_judge_scores(
+    cfg: EvalConfig,
+    cache: ResultCache,
+    sample: Sample,
+    model_answer: str,
+    mode: str,
+) -> Dict[str, float]:
+    """Return judge scores, from the cache in rescore-only mode."""
+    judge_prompt = build_judge_prompt(sample.prompt, model_answer, sample.reference)
+    key = ResultCache.judge_key(cfg.judge_model_name, sample.id, judge_prompt)
+
+    if mode == MODE_RESCORE_ONLY:
+        cached = cache.get("judge", key)
+        if cached is None:
+            raise RuntimeError(
+                f"No cached judge scores for sample {sample.id} "
+                f"(judge={cfg.judge_model_name}); run with --rejudge-only first"
+            )
+        return cached
+
+    scores, parsed = judge_answer(
+        cfg.judge_model_name,
+        sample.prompt,
+        model_answer,
+        sample.reference,
+    )
+    # Never cache the neutral fallback, or --rescore-only would keep it forever
+    if parsed:
+        cache.put("judge", key, scores)
+    return scores
 
 
 # ---------- Main eval loop ----------
 
-def run_evals(config_path: str = "eval_config.yaml") -> None:
-    cfg = load_config(config_path)
-    samples = load_dataset(cfg.dataset_path)
+SCORE_KEYS = ["factuality", "relevance", "coherence", "safety", "calibration"]
 
-    print(f"Loaded {len(samples)} samples from {cfg.dataset_path}")
-    print(f"Evaluating target model: {cfg.target_model_name}")
-    print(f"Using judge model: {cfg.judge_model_name}")
 
-    per_sample_results: List[Dict[str, Any]] = []
+def evaluate_sample(
+    cfg: EvalConfig, cache: ResultCache, sample: Sample, mode: str
+) -> Dict[str, Any]:
+    # 1) Call target model (model under test), or reuse its cached answer
+    target = get_target_answer(cfg, cache, sample, mode)
+    model_answer = target["model_answer"]
+    latency_ms = target["latency_ms"]
+    norm_latency = compute_normalized_latency(latency_ms, cfg.latency_max_ms)
+    print(f"Latency: {latency_ms:.2f} ms (normalized={norm_latency:.3f})")
 
-    total_f = total_r = total_c = total_s = total_k = total_health = 0.0
-    total_latency_ms = 0.0
+    # 2) Judge the answer
+    scores = get_judge_scores(cfg, cache, sample, model_answer, mode)
 
-    for i, sample in enumerate(samples, start=1):
-        print(f"\n=== Sample {i}/{len(samples)} (id={sample.id}) ===")
+    f = scores["factuality"]
+    r = scores["relevance"]
+    c = scores["coherence"]
+    s = scores["safety"]
+    k = scores["calibration"]
 
-        # 1) Call target model (model under test)
-        start = time.time()
-        model_answer = call_gemini_chat(cfg.target_model_name, sample.prompt)
-        latency_ms = (time.time() - start) * 1000.0
-        norm_latency = compute_normalized_latency(latency_ms, cfg.latency_max_ms)
-        print(f"Latency: {latency_ms:.2f} ms (normalized={norm_latency:.3f})")
-
-        # 2) Judge the answer
-        scores = judge_answer(
-            cfg.judge_model_name,
-            sample.prompt,
-            model_answer,
-            sample.reference,
-        )
+    # 3) Compute health score
+    health = compute_health_score(f, r, c, s, norm_latency, k)
 
-        f = scores["factuality"]
-        r = scores["relevance"]
-        c = scores["coherence"]
-        s = scores["safety"]
-        k = scores["calibration"]
+    print(
+        f"Scores: F={f:.2f}, R={r:.2f}, C={c:.2f}, S={s:.2f}, K={k:.2f}, "
+        f"Health={health:.3f}"
+    )
 
-        # 3) Compute health score
-        health = compute_health_score(f, r, c, s, norm_latency, k)
+    return {
+        "id": sample.id,
+        "prompt": sample.prompt,
+        "reference": sample.reference,
+        "model_answer": model_answer,
+        "latency_ms": latency_ms,
+        "normalized_latency": norm_latency,
+        "factuality": f,
+        "relevance": r,
+        "coherence": c,
+        "safety": s,
+        "calibration": k,
+        "health_score": health,
+    }
 
-        print(
-            f"Scores: F={f:.2f}, R={r:.2f}, C={c:.2f}, S={s:.2f}, K={k:.2f}, "
-            f"Health={health:.3f}"
-        )
 
-        total_f += f
-        total_r += r
-        total_c += c
-        total_s += s
-        total_k += k
-        total_health += health
-        total_latency_ms += latency_ms
+def build_summary(
+    cfg: EvalConfig, per_sample_results: List[Dict[str, Any]]
+) -> Dict[str, Any]:
+    n = len(per_sample_results)
 
-        per_sample_results.append(
-            {
-                "id": sample.id,
-                "prompt": sample.prompt,
-                "reference": sample.reference,
-                "model_answer": model_answer,
-                "latency_ms": latency_ms,
-                "normalized_latency": norm_latency,
-                "factuality": f,
-                "relevance": r,
-                "coherence": c,
-                "safety": s,
-                "calibration": k,
-                "health_score": health,
-            }
-        )
+    def avg(key: str) -> float:
+        if n == 0:
+            return 0.0
+        return sum(r[key] for r in per_sample_results) / n
 
-    n = len(samples)
-    summary = {
+    averages = {key: avg(key) for key in SCORE_KEYS}
+    averages["latency_ms"] = avg("latency_ms")
+    averages["health_score"] = avg("health_score")
+
+    return {
         "config": {
             "target_model_name": cfg.target_model_name,
             "judge_model_name": cfg.judge_model_name,
             "dataset_path": cfg.dataset_path,
             "latency_max_ms": cfg.latency_max_ms,
         },
-        "averages": {
-            "factuality": total_f / n,
-            "relevance": total_r / n,
-            "coherence": total_c / n,
-            "safety": total_s / n,
-            "calibration": total_k / n,
-            "latency_ms": total_latency_ms / n,
-            "health_score": total_health / n,
-        },
+        "averages": averages,
         "samples": per_sample_results,
     }
 
-    with open(cfg.output_path, "w", encoding="utf-8") as f:
+
+# ---------- Sharding ----------
+
+def parse_shard(value: str) -> Tuple[int, int]:
+    """Parse "i/N" (0-based shard index i out of N shards)."""
+    try:
+        index_str, count_str = value.split("/")
+        index, count = int(index_str), int(count_str)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"shard must look like i/N, got {value!r}")
+    if count < 1 or not 0 <= index < count:
+        raise argparse.ArgumentTypeError(f"shard index must be in [0, {count}), got {value!r}")
+    return index, count
+
+
+def positive_int(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"expected a positive integer, got {value!r}")
+    return number
+
+
+def shard_samples(samples: List[Sample], index: int, count: int) -> List[Sample]:
+    """
+    Deterministically pick the samples belonging to shard `index` of `count`.
+    Assignment hashes the sample id, so it doesn't depend on dataset order
+    and is stable across machines and Python versions.
+    """
+    return [
+        sample for sample in samples
+        if int(_sha256(sample.id)[:16], 16) % count == index
+    ]
+
+
+def shard_output_path(output_path: str, index: int, count: int) -> str:
+    root, ext = os.path.splitext(output_path)
+    return f"{root}.shard-{index}-of-{count}{ext or '.json'}"
+
+
+def run_evals(
+    config_path: str = "eval_config.yaml",
+    mode: str = MODE_FULL,
+    shard: Optional[Tuple[int, int]] = None,
+) -> None:
+    cfg = load_config(config_path)
+    samples = load_dataset(cfg.dataset_path)
+    cache = ResultCache(cfg.cache_dir)
+    output_path = cfg.output_path
+
+    print(f"Loaded {len(samples)} samples from {cfg.dataset_path}")
+    if shard is not None:
+        samples = shard_samples(samples, *shard)
+        output_path = shard_output_path(cfg.output_path, *shard)
+        print(f"Shard {shard[0]}/{shard[1]}: {len(samples)} samples")
+    print(f"Evaluating target model: {cfg.target_model_name}")
+    print(f"Using judge model: {cfg.judge_model_name}")
+    if mode != MODE_FULL:
+        print(f"Mode: {mode} (cache: {cfg.cache_dir})")
+
+    per_sample_results: List[Dict[str, Any]] = []
+
+    for i, sample in enumerate(samples, start=1):
+        print(f"\n=== Sample {i}/{len(samples)} (id={sample.id}) ===")
+        per_sample_results.append(evaluate_sample(cfg, cache, sample, mode))
+
+    summary = build_summary(cfg, per_sample_results)
+    if shard is not None:
+        summary["shard"] = {"index": shard[0], "count": shard[1]}
+
+    with open(output_path, "w", encoding="utf-8") as f:
         json.dump(summary, f, indent=2, ensure_ascii=False)
 
     print(f"\n=== Evaluation complete ===")
     print(f"Averages: {json.dumps(summary['averages'], indent=2)}")
+    print(f"Report written to: {output_path}")
+
+
+# ---------- Multi-process runs ----------
+
+def merge_reports(config_path: str, shard_paths: List[str]) -> Dict[str, Any]:
+    """
+    Combine per-shard reports into one report with the regular schema.
+    Averages are recomputed over all samples, so every shard is weighted
+    by its sample count.
+    """
+    cfg = load_config(config_path)
+
+    reports = []
+    for path in shard_paths:
+        with open(path, "r", encoding="utf-8") as f:
+            reports.append(json.load(f))
+
+    expected_config = build_summary(cfg, [])["config"]
+    shard_counts = set()
+    seen_indices: Dict[int, str] = {}
+    for path, report in zip(shard_paths, reports):
+        if report["config"] != expected_config:
+            raise RuntimeError(f"{path} was produced with a different config")
+        if "shard" not in report:
+            raise RuntimeError(f"{path} is not a per-shard report")
+        index = report["shard"]["index"]
+        if index in seen_indices:
+            raise RuntimeError(f"Shard {index} given twice: {seen_indices[index]} and {path}")
+        seen_indices[index] = path
+        shard_counts.add(report["shard"]["count"])
+
+    if len(shard_counts) > 1:
+        raise RuntimeError(f"Shard files disagree on shard count: {sorted(shard_counts)}")
+    (count,) = shard_counts
+    missing = set(range(count)) - set(seen_indices)
+    if missing:
+        raise RuntimeError(f"Missing shard results for indices {sorted(missing)}")
+
+    per_sample_results = [s for report in reports for s in report["samples"]]
+
+    # Each dataset sample must appear exactly once, or the averages are skewed
+    dataset_ids = [sample.id for sample in load_dataset(cfg.dataset_path)]
+    seen_ids = set()
+    for result in per_sample_results:
+        if result["id"] in seen_ids:
+            raise RuntimeError(f"Sample {result['id']} appears in more than one shard report")
+        seen_ids.add(result["id"])
+    if seen_ids != set(dataset_ids):
+        missing_ids = sorted(set(dataset_ids) - seen_ids)
+        extra_ids = sorted(seen_ids - set(dataset_ids))
+        raise RuntimeError(
+            f"Shard reports don't match the dataset: missing={missing_ids} extra={extra_ids}"
+        )
+
+    # Restore dataset order so merged reports diff cleanly against single runs
+    order = {sample_id: i for i, sample_id in enumerate(dataset_ids)}
+    per_sample_results.sort(key=lambda r: order[r["id"]])
+
+    summary = build_summary(cfg, per_sample_results)
+
+    with open(cfg.output_path, "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2, ensure_ascii=False)
+
+    print(f"Merged {len(shard_paths)} shard reports ({len(per_sample_results)} samples)")
+    print(f"Averages: {json.dumps(summary['averages'], indent=2)}")
     print(f"Report written to: {cfg.output_path}")
+    return summary
+
+
+def launch_workers(config_path: str, mode: str, workers: int) -> None:
+    """Run `workers` shard processes locally, then merge their results."""
+    cfg = load_config(config_path)
+
+    mode_args = [] if mode == MODE_FULL else [f"--{mode}"]
+    procs = []
+    shard_paths = []
+    for index in range(workers):
+        shard_path = shard_output_path(cfg.output_path, index, workers)
+        log_path = os.path.splitext(shard_path)[0] + ".log"
+        log_file = open(log_path, "w", encoding="utf-8")
+        cmd = [
+            sys.executable,
+            os.path.abspath(__file__),
+            "--config", config_path,
+            "--shard", f"{index}/{workers}",
+            *mode_args,
+        ]
+        procs.append((subprocess.Popen(cmd, stdout=log_file, stderr=subprocess.STDOUT), log_file))
+        shard_paths.append(shard_path)
+        print(f"Started shard {index}/{workers} (log: {log_path})")
+
+    failed = []
+    for index, (proc, log_file) in enumerate(procs):
+        proc.wait()
+        log_file.close()
+        if proc.returncode != 0:
+            failed.append(index)
+
+    if failed:
+        raise RuntimeError(f"Shard workers failed: {failed}; see the .log files")
+
+    merge_reports(config_path, shard_paths)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run offline evals against a dataset.")
+    parser.add_argument("--config", default="eval_config.yaml")
+    reuse = parser.add_mutually_exclusive_group()
+    reuse.add_argument(
+        "--rejudge-only",
+        action="store_true",
+        help="reuse cached target answers/latencies and only re-run the judge",
+    )
+    reuse.add_argument(
+        "--rescore-only",
+        action="store_true",
+        help="reuse cached answers and judge scores; only recompute health",
+    )
+    parallel = parser.add_mutually_exclusive_group()
+    parallel.add_argument(
+        "--shard",
+        type=parse_shard,
+        metavar="i/N",
+        help="only evaluate shard i of N and write a per-shard report",
+    )
+    parallel.add_argument(
+        "--workers",
+        type=positive_int,
+        metavar="N",
+        help="run N shard processes locally and merge their reports",
+    )
+    parallel.add_argument(
+        "--merge",
+        nargs="+",
+        metavar="SHARD_REPORT",
+        help="merge per-shard reports into the configured output path",
+    )
+    return parser.parse_args()
 
 
 if __name__ == "__main__":
-    run_evals()
+    args = parse_args()
+    if args.rescore_only:
+        run_mode = MODE_RESCORE_ONLY
+    elif args.rejudge_only:
+        run_mode = MODE_REJUDGE_ONLY
+    else:
+        run_mode = MODE_FULL
+
+    if args.merge:
+        merge_reports(args.config, args.merge)
+    elif args.workers:
+        launch_workers(args.config, run_mode, args.workers)
+    else:
+        run_evals(args.config, run_mode, args.shard)
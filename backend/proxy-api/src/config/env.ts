@@ -8,6 +8,14 @@ interface EnvConfig {
     GEMINI_API_KEY: string;
     GEMINI_MODEL: string;
     EVALUATOR_URL: string;
+    EVAL_SAMPLE_RATE: number;
+    EVAL_SAMPLE_RATES_BY_MODEL: Map<string, number>;
+    EVAL_SAMPLE_RATES_BY_USER: Map<string, number>;
+    EVAL_ALWAYS_USERS: string[];
+    EVAL_FLAGGED_PRIORITY: number;
+    EVAL_QUEUE_MAX: number;
+    EVAL_CONCURRENCY: number;
+    EVAL_TIMEOUT_MS: number;
 }
 
 const PORT = parseInt(process.env.PORT || "8080", 10);
@@ -20,11 +28,64 @@ if (!process.env.EVALUATOR_URL) {
     throw new Error("EVALUATOR_URL is not set in environment variables");
 }
 
+/**
+ * Parses a sampling rate, which must be a number in [0, 1]. A typo would
+ * otherwise become NaN and silently turn evaluation off.
+ */
+function parseRate(name: string, value: string): number {
+    const rate = value.trim() === "" ? NaN : Number(value);
+    if (!Number.isFinite(rate) || rate < 0 || rate > 1) {
+        throw new Error(`${name} must be a number between 0 and 1, got "${value}"`);
+    }
+    return rate;
+}
+
+/**
+ * Parses "key=rate,key2=rate2" into a lookup table, e.g.
+ * EVAL_SAMPLE_RATES_BY_MODEL="gemini-2.0-flash=0.1,gemini-2.5-pro=1".
+ * A Map, so keys like "constructor" can't hit Object.prototype.
+ */
+function parseRates(name: string, value: string | undefined): Map<string, number> {
+    const rates = new Map<string, number>();
+    for (const entry of (value || "").split(",")) {
+        const [key, rate] = entry.split("=").map((s) => s.trim());
+        if (!key) {
+            continue;
+        }
+        if (rate === undefined) {
+            throw new Error(`${name} entry "${entry.trim()}" must look like key=rate`);
+        }
+        rates.set(key, parseRate(`${name} rate for "${key}"`, rate));
+    }
+    return rates;
+}
+
+function parseList(value: string | undefined): string[] {
+    return (value || "").split(",").map((s) => s.trim()).filter(Boolean);
+}
+
 const config: EnvConfig = {
     PORT,
     GEMINI_API_KEY: process.env.GEMINI_API_KEY,
     GEMINI_MODEL: process.env.GEMINI_MODEL || "gemini-2.0-flash",
-    EVALUATOR_URL: process.env.EVALUATOR_URL
+    EVALUATOR_URL: process.env.EVALUATOR_URL,
+    // Fraction of chats sent for evaluation (0-1); per-user rates win over per-model rates
+    EVAL_SAMPLE_RATE: parseRate("EVAL_SAMPLE_RATE", process.env.EVAL_SAMPLE_RATE || "1"),
+    EVAL_SAMPLE_RATES_BY_MODEL: parseRates(
+        "EVAL_SAMPLE_RATES_BY_MODEL",
+        process.env.EVAL_SAMPLE_RATES_BY_MODEL
+    ),
+    EVAL_SAMPLE_RATES_BY_USER: parseRates(
+        "EVAL_SAMPLE_RATES_BY_USER",
+        process.env.EVAL_SAMPLE_RATES_BY_USER
+    ),
+    // Flagged users are always evaluated, at EVAL_FLAGGED_PRIORITY
+    EVAL_ALWAYS_USERS: parseList(process.env.EVAL_ALWAYS_USERS),
+    EVAL_FLAGGED_PRIORITY: parseInt(process.env.EVAL_FLAGGED_PRIORITY || "10", 10),
+    // Outbound evaluation queue: max pending payloads and in-flight requests
+    EVAL_QUEUE_MAX: parseInt(process.env.EVAL_QUEUE_MAX || "1000", 10),
+    EVAL_CONCURRENCY: parseInt(process.env.EVAL_CONCURRENCY || "4", 10),
+    EVAL_TIMEOUT_MS: parseInt(process.env.EVAL_TIMEOUT_MS || "30000", 10)
 };
 
 export default config;
@@ -3,6 +3,7 @@ import express from "express";
 import cors from "cors";
 import config from "./config/env";
 import chatRouter from "./routes/chat";
+import evaluationQueue from "./services/evaluationQueue";
 
 const app = express();
 
@@ -12,7 +13,7 @@ app.use(express.json());
 
 // Health check endpoint
 app.get("/health", (_req, res) => {
-    res.json({ status: "ok", service: "proxy-api" });
+    res.json({ status: "ok", service: "proxy-api", evaluationQueue: evaluationQueue.stats() });
 });
 
 // Routes
@@ -1,7 +1,8 @@
 // src/routes/chat.ts
 import { Router, Request, Response } from "express";
 import { callGptModel } from "../services/gptClient";
-import { sendForEvaluation } from "../services/evaluatorClient";
+import evaluationQueue from "../services/evaluationQueue";
+import { decideEvaluation } from "../services/evaluationSampler";
 
 const router = Router();
 
@@ -12,7 +13,7 @@ const router = Router();
  * Flow:
  * 1. Call GPT model for the answer.
  * 2. Measure latency.
- * 3. Asynchronously send data to evaluator-service.
+ * 3. Sample and queue the data for evaluator-service (async, bounded).
  * 4. Return GPT answer immediately to user.
  */
 router.post("/chat", async (req: Request, res: Response) => {
@@ -39,14 +40,13 @@ router.post("/chat", async (req: Request, res: Response) => {
             userId
         };
 
-        // 3) Send to evaluator (async, don't block user)
-        sendForEvaluation(evalPayload).then((evalRes) => {
-            if (evalRes) {
-                console.log(
-                    `Evaluation completed for request: healthScore=${evalRes.healthScore.toFixed(3)}`
-                );
-            }
-        });
+        // 3) Queue for the evaluator (async, don't block user)
+        const decision = decideEvaluation(gptResult.model, userId);
+        if (!decision.evaluate) {
+            evaluationQueue.recordSampledOut();
+        } else if (!evaluationQueue.enqueue(evalPayload, decision.priority)) {
+            console.warn("Evaluation queue full; dropped evaluation for this request");
+        }
 
         // 4) Respond to the client
         return res.json({
@@ -0,0 +1,112 @@
+// src/services/evaluationQueue.ts
+import config from "../config/env";
+import { EvaluationPayload, sendForEvaluation } from "./evaluatorClient";
+
+interface QueuedEvaluation {
+    payload: EvaluationPayload;
+    priority: number;
+    seq: number;
+}
+
+export interface EvaluationQueueStats {
+    pending: number;
+    inFlight: number;
+    enqueued: number;
+    sampledOut: number;
+    dropped: number;
+    completed: number;
+    failed: number;
+}
+
+/**
+ * Bounded, priority-ordered outbound queue to the evaluator service.
+ *
+ * At most `concurrency` evaluations are in flight at once; everything else
+ * waits here, highest priority first (FIFO within a priority). When the queue
+ * is full the lowest-priority, newest payload is dropped, so a slow evaluator
+ * costs us evaluations rather than unbounded memory in the proxy.
+ */
+export class EvaluationQueue {
+    private pending: QueuedEvaluation[] = [];
+    private inFlight = 0;
+    private seq = 0;
+    private counters = {
+        enqueued: 0,
+        sampledOut: 0,
+        dropped: 0,
+        completed: 0,
+        failed: 0
+    };
+
+    constructor(
+        private readonly maxPending: number,
+        private readonly concurrency: number
+    ) {}
+
+    /**
+     * Queues a payload for evaluation. Returns false if it was dropped.
+     */
+    enqueue(payload: EvaluationPayload, priority: number): boolean {
+        const item = { payload, priority, seq: this.seq++ };
+
+        if (this.pending.length >= this.maxPending) {
+            // pending is sorted, so the last entry is the one we'd drop first
+            const lowest = this.pending[this.pending.length - 1];
+            if (!lowest || lowest.priority >= priority) {
+                this.counters.dropped++;
+                return false;
+            }
+            this.pending.pop();
+            this.counters.dropped++;
+        }
+
+        // Insert after every item of equal or higher priority
+        let index = this.pending.findIndex((queued) => queued.priority < priority);
+        if (index === -1) {
+            index = this.pending.length;
+        }
+        this.pending.splice(index, 0, item);
+        this.counters.enqueued++;
+
+        this.drain();
+        return true;
+    }
+
+    recordSampledOut(): void {
+        this.counters.sampledOut++;
+    }
+
+    stats(): EvaluationQueueStats {
+        return {
+            pending: this.pending.length,
+            inFlight: this.inFlight,
+            ...this.counters
+        };
+    }
+
+    private drain(): void {
+        while (this.inFlight < this.concurrency && this.pending.length > 0) {
+            const item = this.pending.shift()!;
+            this.inFlight++;
+            sendForEvaluation({ ...item.payload, priority: item.priority })
+                .then((evalRes) => {
+                    if (evalRes) {
+                        this.counters.completed++;
+                        console.log(
+                            `Evaluation completed for request: healthScore=${evalRes.healthScore.toFixed(3)}`
+                        );
+                    } else {
+                        this.counters.failed++;
+                    }
+                })
+                .finally(() => {
+                    this.inFlight--;
+                    this.drain();
+                });
+        }
+    }
+}
+
+const evaluationQueue = new EvaluationQueue(config.EVAL_QUEUE_MAX, config.EVAL_CONCURRENCY);
+
+export default evaluationQueue;
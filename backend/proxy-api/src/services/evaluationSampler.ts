@@ -0,0 +1,30 @@
+// src/services/evaluationSampler.ts
+import config from "../config/env";
+
+export interface SamplingDecision {
+    evaluate: boolean;
+    priority: number;
+}
+
+/**
+ * Decides whether a chat is sent to the evaluator, and at what priority.
+ *
+ * Order of precedence:
+ * 1. Flagged users (EVAL_ALWAYS_USERS) are always evaluated, at high priority.
+ * 2. A per-user rate (EVAL_SAMPLE_RATES_BY_USER).
+ * 3. A per-model rate (EVAL_SAMPLE_RATES_BY_MODEL).
+ * 4. The global EVAL_SAMPLE_RATE.
+ */
+export function decideEvaluation(modelName: string, userId?: string): SamplingDecision {
+    if (userId && config.EVAL_ALWAYS_USERS.includes(userId)) {
+        return { evaluate: true, priority: config.EVAL_FLAGGED_PRIORITY };
+    }
+
+    const userRate = userId ? config.EVAL_SAMPLE_RATES_BY_USER.get(userId) : undefined;
+    const rate =
+        userRate ??
+        config.EVAL_SAMPLE_RATES_BY_MODEL.get(modelName) ??
+        config.EVAL_SAMPLE_RATE;
+
+    return { evaluate: Math.random() < rate, priority: 0 };
+}
@@ -8,6 +8,7 @@ export interface EvaluationPayload {
     latencyMs: number;
     modelName: string;
     userId?: string;
+    priority?: number;
 }
 
 export interface EvaluationResult {
@@ -19,13 +20,16 @@ export interface EvaluationResult {
     normalizedLatency: number;
     calibration: number;
     healthScore: number;
+    reusedFromRequestId?: number | null;
 }
 
 export async function sendForEvaluation(
     payload: EvaluationPayload
 ): Promise<EvaluationResult | null> {
     try {
-        const res = await axios.post(config.EVALUATOR_URL, payload);
+        const res = await axios.post(config.EVALUATOR_URL, payload, {
+            timeout: config.EVAL_TIMEOUT_MS
+        });
         return res.data as EvaluationResult;
     } catch (err) {
         console.error("Error sending data to evaluator service:", err);